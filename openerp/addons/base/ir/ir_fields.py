@@ -3,22 +3,53 @@ import io
 import datetime
 import functools
 import itertools
-import time
+import re
+from collections import defaultdict
 
 import psycopg2
 import pytz
 
-from openerp import models, api, _
-from openerp.tools import DEFAULT_SERVER_DATE_FORMAT, DEFAULT_SERVER_DATETIME_FORMAT, ustr
+from openerp import models, api, tools, _
+from openerp.tools import DEFAULT_SERVER_DATETIME_FORMAT, ustr
 
-REFERENCING_FIELDS = set([None, 'id', '.id'])
+# equivalent to DEFAULT_SERVER_DATE_FORMAT and DEFAULT_SERVER_DATETIME_FORMAT,
+# for validating imported values without going through strptime
+DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})', re.ASCII)
+DATETIME_RE = re.compile(
+    r'(\d{4})-(\d{1,2})-(\d{1,2})\s+(\d{1,2}):(\d{1,2}):(\d{1,2})', re.ASCII)
+
+# untranslated words accepted for boolean fields
+BOOLEAN_TRUES = frozenset(['1', "true", "yes"])
+BOOLEAN_FALSES = frozenset(['', "0", "false", "no"])
+
+REFERENCING_FIELDS = frozenset([None, 'id', '.id'])
 def only_ref_fields(record):
     return dict((k, v) for k, v in record.items()
                 if k in REFERENCING_FIELDS)
 def exclude_ref_fields(record):
     return dict((k, v) for k, v in record.items()
                 if k not in REFERENCING_FIELDS)
-
+def partition_ref_fields(record):
+    """ Returns both ``only_ref_fields(record)`` and
+    ``exclude_ref_fields(record)``, in a single pass over ``record`` """
+    refs, rest = {}, {}
+    for k, v in record.items():
+        if k in REFERENCING_FIELDS:
+            refs[k] = v
+        else:
+            rest[k] = v
+    return refs, rest
+
+def sanitize_error_param(param):
+    """ Escapes ``%`` in string error parameters, as the import system
+    formats error messages a second time
+    """
+    if isinstance(param, str) and '%' in param:
+        return param.replace('%', '%%')
+    return param
+
+# DEPRECATED: command builders kept for compatibility, the converters build
+# the command tuples inline as they are generated for every imported cell
 CREATE = lambda values: (0, False, values)
 UPDATE = lambda id, values: (1, id, values)
 DELETE = lambda id: (2, id, False)
@@ -40,16 +71,196 @@ class ir_fields_converter(models.Model):
     @api.model
     def _format_import_error(self, error_type, error_msg, error_params=(), error_args=None):
         # sanitize error params for later formatting by the import system
-        sanitize = lambda p: p.replace('%', '%%') if isinstance(p, str) else p
         if error_params:
             if isinstance(error_params, str):
-                error_params = sanitize(error_params)
+                error_params = sanitize_error_param(error_params)
             elif isinstance(error_params, dict):
-                error_params = dict((k, sanitize(v)) for k, v in error_params.items())
+                if any(isinstance(v, str) for v in error_params.values()):
+                    error_params = dict((k, sanitize_error_param(v))
+                                        for k, v in error_params.items())
             elif isinstance(error_params, tuple):
-                error_params = tuple(map(sanitize, error_params))
+                if any(isinstance(p, str) for p in error_params):
+                    error_params = tuple(map(sanitize_error_param, error_params))
         return error_type(error_msg % error_params, error_args)
 
+    @api.model
+    def _reference_cache(self):
+        """ Returns the cache of references resolved during the current
+        import, mapping ``(comodel, subfield, value)`` to ``(id, warnings)``.
+        Only successful lookups are cached, records created by earlier rows of
+        the import must still be found by later rows.
+        """
+        return self._cr.cache.setdefault(self._name + ':references', {})
+
+    @api.model
+    def _converter_cache(self):
+        """ Returns the cache of field converters built during the current
+        import, mapping ``(env, model name, fromtype)`` to a dict of field
+        converters. Converters are bound to the environment and cursor, they
+        can not be shared at the registry level.
+        """
+        return self._cr.cache.setdefault(self._name + ':converters', {})
+
+    @api.model
+    def clear_import_cache(self):
+        """ Drops the references, converters and selections cached by the
+        conversion, to be called once an import is done
+        """
+        self._cr.cache.pop(self._name + ':references', None)
+        self._cr.cache.pop(self._name + ':converters', None)
+        self._cr.cache.pop(self._name + ':selections', None)
+
+    @api.model
+    def prefetch_references(self, model, records):
+        """ Resolves in bulk the references (database ids, external ids and
+        names) found in the relational fields of ``records`` (as generated by
+        :meth:`openerp.models.Model._extract_records`), with one query per
+        referenced model instead of one query per cell. Names are only
+        prefetched for models using the default ``name_search``, the others
+        are cached by :meth:`~.db_id_for` on first lookup instead.
+
+        :param model: :class:`openerp.osv.orm.Model` the records belong to
+        :param records: list of record dicts about to be converted
+        """
+        pending = defaultdict(set)
+        self._collect_references(self.env[model._name], records, pending)
+
+        cache = self._reference_cache()
+        for (comodel, subfield), values in pending.items():
+            values = [v for v in values if (comodel, subfield, v) not in cache]
+            if not values:
+                continue
+            if subfield == '.id':
+                resolved = self._resolve_database_ids(comodel, values)
+            elif subfield == 'id':
+                resolved = self._resolve_external_ids(comodel, values)
+            else:
+                resolved = self._resolve_names(comodel, values)
+            for value, result in resolved.items():
+                cache[comodel, subfield, value] = result
+
+    def _collect_references(self, model, records, pending):
+        """ Walks ``records`` and adds the references they contain to
+        ``pending``, a mapping of ``(comodel, subfield)``
+        to a set of values. Malformed references are ignored, they are
+        reported by the conversion itself.
+        """
+        for record in records:
+            for name, value in record.items():
+                field = model._fields.get(name)
+                if not value or field is None or not field.relational:
+                    continue
+                comodel = field.comodel_name
+                split = field.type == 'many2many' or (
+                    field.type == 'one2many' and len(value) == 1
+                    and REFERENCING_FIELDS.issuperset(value[0]))
+                subrecords = []
+                for subrecord in value:
+                    refs, rest = partition_ref_fields(subrecord)
+                    subrecords.append(rest)
+                    if len(refs) == 1:
+                        [(subfield, reference)] = refs.items()
+                        if reference:
+                            pending[comodel, subfield].update(
+                                reference.split(',') if split else [reference])
+                if field.type == 'one2many' and not split:
+                    self._collect_references(
+                        self.env[comodel], subrecords, pending)
+
+    def _resolve_database_ids(self, comodel, values):
+        """ Returns a dict mapping each of ``values`` matching an existing
+        record of ``comodel`` to its database id and warnings
+        """
+        candidates = defaultdict(list)
+        for value in values:
+            try:
+                id = int(value)
+            except ValueError:
+                continue
+            # out of range ids would break the transaction, let the
+            # conversion report them
+            if 0 < id < 2**31:
+                candidates[id].append(value)
+
+        result = {}
+        RelatedModel = self.env[comodel]
+        for sub_ids in self._cr.split_for_in_conditions(list(candidates)):
+            for id in RelatedModel.search([('id', 'in', sub_ids)]).ids:
+                for value in candidates[id]:
+                    result[value] = (id, [])
+        return result
+
+    def _resolve_external_ids(self, comodel, values):
+        """ Returns a dict mapping each of ``values`` which is the external id
+        of an existing record to the record's database id and warnings, with
+        the same semantics as ``self.env.ref``
+        """
+        current_module = self._context.get('_import_current_module', '')
+        xmlids = defaultdict(list)
+        for value in values:
+            xmlid = value if '.' in value else "%s.%s" % (current_module, value)
+            module, name = xmlid.split('.', 1)
+            xmlids[module, name].append(value)
+
+        targets = defaultdict(lambda: defaultdict(list))
+        ModelData = self.env['ir.model.data']
+        for sub_xmlids in self._cr.split_for_in_conditions(list(xmlids)):
+            data = ModelData.search_read(
+                [('module', 'in', list(set(m for m, _n in sub_xmlids))),
+                 ('name', 'in', list(set(n for _m, n in sub_xmlids)))],
+                ['module', 'name', 'model', 'res_id'])
+            for d in data:
+                key = (d['module'], d['name'])
+                if d['res_id'] and key in xmlids:
+                    targets[d['model']][d['res_id']].extend(xmlids[key])
+
+        result = {}
+        for res_model, res_ids in targets.items():
+            if res_model not in self.pool:
+                continue
+            for record in self.env[res_model].browse(list(res_ids)).exists():
+                for value in res_ids[record.id]:
+                    result[value] = (record.id, [])
+        return result
+
+    def _resolve_names(self, comodel, values):
+        """ Returns a dict mapping each of ``values`` which is the name of
+        existing records of ``comodel`` to the first record's database id
+        and warnings, with the same semantics as ``name_search`` with the
+        ``=`` operator. Only resolves names of models using the default
+        ``name_search`` on a plain stored name field, returns an empty dict
+        for the other models.
+        """
+        RelatedModel = self.env[comodel]
+        cls = type(RelatedModel)
+        rec_name = RelatedModel._rec_name
+        field = RelatedModel._fields.get(rec_name)
+        if (cls.name_search is not models.BaseModel.name_search
+                or cls._name_search is not models.BaseModel._name_search
+                or field is None or not field.store or field.translate
+                or field.type not in ('char', 'text')):
+            return {}
+
+        # records are returned in the model's order, as by name_search
+        matches = defaultdict(list)
+        for sub_values in self._cr.split_for_in_conditions(list(values)):
+            for record in RelatedModel.search([(rec_name, 'in', sub_values)]):
+                matches[record[rec_name]].append(record.id)
+
+        result = {}
+        for value, ids in matches.items():
+            # name_search is limited to 100 results
+            result[value] = (ids[0], self._multiple_matches(min(len(ids), 100)))
+        return result
+
+    def _multiple_matches(self, count):
+        """ Returns the warnings for a name matching ``count`` records """
+        if count > 1:
+            return [ImportWarning(
+                _("Found multiple matches for field '%%(field)s' (%d matches)")
+                % count)]
+        return []
+
     @api.model
     def for_model(self, model, fromtype=str):
         """ Returns a converter object for the model. A converter is a
@@ -64,33 +275,116 @@ class ir_fields_converter(models.Model):
         # make sure model is new api
         model = self.env[model._name]
 
-        converters = {
-            name: self.to_field(model, field, fromtype)
-            for name, field in model._fields.items()
-        }
+        converters = self._field_converters(model, fromtype)
+        skip = REFERENCING_FIELDS
 
         def fn(record, log):
             converted = {}
             for field, value in record.items():
-                if field in (None, 'id', '.id'):
+                if field in skip:
                     continue
                 if not value:
                     converted[field] = False
                     continue
                 try:
                     converted[field], ws = converters[field](value)
+                except ValueError as e:
+                    log(field, e)
+                    continue
+                # most conversions do not generate warnings
+                if ws:
                     for w in ws:
                         if isinstance(w, str):
                             # wrap warning string in an ImportWarning for
                             # uniform handling
                             w = ImportWarning(w)
                         log(field, w)
-                except ValueError as e:
-                    log(field, e)
             return converted
 
         return fn
 
+    @api.model
+    def for_model_bulk(self, model, header, rows, log, fromtype=str):
+        """ Converts a whole table of flat records at once, the table-based
+        counterpart of :meth:`~.for_model`: the converters are looked up once
+        per column instead of once per cell, and no intermediate record dict
+        is built.
+
+        :param model: :class:`openerp.osv.orm.Model` for the conversion base
+        :param header: list of the field names of the columns, referencing
+                       subfields (``None``, ``id``, ``.id``) are skipped
+        :param rows: list of rows of values of typetag ``fromtype``, can not
+                     hold relational values (lists of sub-records)
+        :param log: callable logging conversion errors and warnings
+        :type log: (index: int, field: str, error) -> None
+        :returns: list of converted records, one per row
+        :rtype: list(dict)
+        """
+        # the caches already on the cursor belong to an enclosing conversion,
+        # which is in charge of dropping them
+        prefix = self._name + ':'
+        cache = self._cr.cache
+        outer_keys = set(cache)
+        try:
+            converters = self._field_converters(self.env[model._name], fromtype)
+            columns = tuple(
+                (index, field, converters[field])
+                for index, field in enumerate(header)
+                if field not in REFERENCING_FIELDS
+            )
+
+            result = [None] * len(rows)
+            for index, row in enumerate(rows):
+                converted = result[index] = {}
+                for column, field, converter in columns:
+                    value = row[column]
+                    if not value:
+                        converted[field] = False
+                        continue
+                    try:
+                        converted[field], ws = converter(value)
+                    except ValueError as e:
+                        log(index, field, e)
+                        continue
+                    for w in ws:
+                        if isinstance(w, str):
+                            w = ImportWarning(w)
+                        log(index, field, w)
+        finally:
+            # drop the caches filled by this conversion only
+            for key in list(cache):
+                if key not in outer_keys and isinstance(key, str) and key.startswith(prefix):
+                    del cache[key]
+        return result
+
+    @api.model
+    def _field_converters(self, model, fromtype=str):
+        """ Returns a dict mapping each field of ``model`` to its converter
+        from ``fromtype``, as returned by :meth:`~.to_field`. Cached for the
+        current import.
+        """
+        cache = self._converter_cache()
+        key = (self.env, model._name, fromtype)
+        if key in cache:
+            return cache[key]
+
+        converters = {
+            name: self.to_field(model, field, fromtype)
+            for name, field in model._fields.items()
+        }
+        if fromtype is str:
+            # the input timezone is invariant for the whole conversion, look
+            # it up once instead of for every datetime cell
+            datetime_fields = [name for name, field in model._fields.items()
+                               if field.type == 'datetime']
+            if datetime_fields:
+                input_tz = self._input_tz()
+                for name in datetime_fields:
+                    converters[name] = functools.partial(
+                        converters[name], input_tz=input_tz)
+        cache[key] = converters
+        return converters
+
     @api.model
     def to_field(self, model, field, fromtype=str):
         """ Fetches a converter for the provided field object, from the
@@ -134,31 +428,62 @@ class ir_fields_converter(models.Model):
         assert isinstance(fromtype, (type, str))
         # FIXME: return None
         typename = fromtype.__name__ if isinstance(fromtype, type) else fromtype
-        converter = getattr(self, '_%s_to_%s' % (typename, field.type), None)
+        converter = self._converter_method(typename, field.type)
         if not converter:
             return None
-        return functools.partial(converter, model, field)
+        return functools.partial(converter, self, model, field)
+
+    @api.model
+    @tools.ormcache(skiparg=1)
+    def _converter_method(self, typename, fieldtype):
+        """ Returns the (unbound) method converting values of type
+        ``typename`` for fields of type ``fieldtype``, named
+        ``_$typename_to_$fieldtype``, or ``None``. Cached on the registry as
+        it only depends on the model's class.
+        """
+        return getattr(type(self), '_%s_to_%s' % (typename, fieldtype), None)
+
+    @api.model
+    def _boolean_vocabulary(self):
+        """ Returns the words accepted as true and false for boolean fields
+        (lowercased) and the label of the value assumed for unknown words, in
+        the current language. Cached on the cursor as they are invariant for
+        the whole import.
+
+        :rtype: (frozenset, frozenset, unicode)
+        """
+        cache = self._cr.cache.setdefault(self._name + ':booleans', {})
+        lang = self.env.lang
+        if lang not in cache:
+            # all translatables used for booleans
+            true, yes, false, no = _("true"), _("yes"), _("false"), _("no")
+            # potentially broken casefolding? What about locales?
+            trues = frozenset(word.lower() for word in itertools.chain(
+                BOOLEAN_TRUES, # don't use potentially translated values
+                self._get_translations(['code'], "true"),
+                self._get_translations(['code'], "yes"),
+            ))
+            falses = frozenset(word.lower() for word in itertools.chain(
+                BOOLEAN_FALSES,
+                self._get_translations(['code'], "false"),
+                self._get_translations(['code'], "no"),
+            ))
+            cache[lang] = (trues, falses, yes)
+        return cache[lang]
 
     @api.model
     def _str_to_boolean(self, model, field, value):
-        # all translatables used for booleans
-        true, yes, false, no = _("true"), _("yes"), _("false"), _("no")
-        # potentially broken casefolding? What about locales?
-        trues = set(word.lower() for word in itertools.chain(
-            ['1', "true", "yes"], # don't use potentially translated values
-            self._get_translations(['code'], "true"),
-            self._get_translations(['code'], "yes"),
-        ))
-        if value.lower() in trues:
+        word = value.lower()
+        # most files use the untranslated words, no need for the vocabulary
+        if word in BOOLEAN_TRUES:
             return True, []
+        if word in BOOLEAN_FALSES:
+            return False, []
 
-        # potentially broken casefolding? What about locales?
-        falses = set(word.lower() for word in itertools.chain(
-            ['', "0", "false", "no"],
-            self._get_translations(['code'], "false"),
-            self._get_translations(['code'], "no"),
-        ))
-        if value.lower() in falses:
+        trues, falses, yes = self._boolean_vocabulary()
+        if word in trues:
+            return True, []
+        if word in falses:
             return False, []
 
         return True, [self._format_import_error(
@@ -199,7 +524,15 @@ class ir_fields_converter(models.Model):
     @api.model
     def _str_to_date(self, model, field, value):
         try:
-            time.strptime(value, DEFAULT_SERVER_DATE_FORMAT)
+            match = DATE_RE.fullmatch(value)
+            if not match:
+                raise ValueError(value)
+            # check the date actually exists, zero-padded dates (the vast
+            # majority) go through the much faster ISO parser
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                datetime.date(*map(int, match.groups()))
             return value, []
         except ValueError:
             raise self._format_import_error(
@@ -230,10 +563,18 @@ class ir_fields_converter(models.Model):
         return pytz.UTC
 
     @api.model
-    def _str_to_datetime(self, model, field, value):
+    def _str_to_datetime(self, model, field, value, input_tz=None):
         try:
-            parsed_value = datetime.datetime.strptime(
-                value, DEFAULT_SERVER_DATETIME_FORMAT)
+            match = DATETIME_RE.fullmatch(value)
+            if not match:
+                raise ValueError(value)
+            # zero-padded values (the vast majority) go through the much
+            # faster ISO parser, the pattern already excluded the other ISO
+            # forms (timezones, fractions, ...) it accepts
+            try:
+                parsed_value = datetime.datetime.fromisoformat(value)
+            except ValueError:
+                parsed_value = datetime.datetime(*map(int, match.groups()))
         except ValueError:
             raise self._format_import_error(
                 ValueError,
@@ -242,36 +583,59 @@ class ir_fields_converter(models.Model):
                 {'moreinfo': _("Use the format '%s'") % "2012-12-31 23:59:59"}
             )
 
-        input_tz = self._input_tz()# Apply input tz to the parsed naive datetime
+        if input_tz is None:
+            input_tz = self._input_tz()
+        # Apply input tz to the parsed naive datetime
         dt = input_tz.localize(parsed_value, is_dst=False)
         # And convert to UTC before reformatting for writing
         return dt.astimezone(pytz.UTC).strftime(DEFAULT_SERVER_DATETIME_FORMAT), []
 
     @api.model
     def _get_translations(self, types, src):
-        types = tuple(types)
+        key = (tuple(types), src)
         # Cache translations so they don't have to be reloaded from scratch on
         # every row of the file
-        tnx_cache = self._cr.cache.setdefault(self._name, {})
-        if tnx_cache.setdefault(types, {}) and src in tnx_cache[types]:
-            return tnx_cache[types][src]
+        tnx_cache = self._cr.cache.setdefault(self._name + ':translations', {})
+        result = tnx_cache.get(key)
+        if result is not None:
+            return result
 
         Translations = self.env['ir.translation']
-        tnx = Translations.search([('type', 'in', types), ('src', '=', src)])
-        result = tnx_cache[types][src] = [t.value for t in tnx if t.value is not False]
+        tnx = Translations.search([('type', 'in', key[0]), ('src', '=', src)])
+        result = tnx_cache[key] = [t.value for t in tnx if t.value is not False]
         return result
 
     @api.model
-    def _str_to_selection(self, model, field, value):
-        # get untranslated values
-        env = self.with_context(lang=None).env
-        selection = field.get_description(env)['selection']
+    def _selection_lookup(self, model, field):
+        """ Returns a dict mapping every value accepted for the selection
+        field ``field`` (the string of each item, its label and the label's
+        translations) to the corresponding item, and the field's untranslated
+        selection. Cached for the current import.
+
+        :rtype: (dict, list)
+        """
+        cache = self._cr.cache.setdefault(self._name + ':selections', {})
+        key = (model._name, field.name, self.env.lang)
+        if key not in cache:
+            # get untranslated values
+            env = self.with_context(lang=None).env
+            selection = field.get_description(env)['selection']
+
+            lookup = {}
+            for item, label in selection:
+                label = ustr(label)
+                labels = [label] + self._get_translations(('selection', 'model', 'code'), label)
+                # earlier items take precedence
+                for accepted in itertools.chain([str(item)], labels):
+                    lookup.setdefault(accepted, item)
+            cache[key] = (lookup, selection)
+        return cache[key]
 
-        for item, label in selection:
-            label = ustr(label)
-            labels = [label] + self._get_translations(('selection', 'model', 'code'), label)
-            if value == str(item) or value in labels:
-                return item, []
+    @api.model
+    def _str_to_selection(self, model, field, value):
+        lookup, selection = self._selection_lookup(model, field)
+        if value in lookup:
+            return lookup[value], []
 
         raise self._format_import_error(
             ValueError,
@@ -298,6 +662,12 @@ class ir_fields_converter(models.Model):
                  warnings
         :rtype: (ID|None, unicode, list)
         """
+        cache = self._reference_cache()
+        key = (field.comodel_name, subfield, value)
+        if key in cache:
+            id, warnings = cache[key]
+            return id, self._reference_type(subfield), list(warnings)
+
         id = None
         warnings = []
         action = {'type': 'ir.actions.act_window', 'target': 'new',
@@ -311,8 +681,8 @@ class ir_fields_converter(models.Model):
             action['domain'] = [('model', '=', field.comodel_name)]
 
         RelatedModel = self.env[field.comodel_name]
+        field_type = self._reference_type(subfield)
         if subfield == '.id':
-            field_type = _("database id")
             try: tentative_id = int(value)
             except ValueError: tentative_id = value
             try:
@@ -326,30 +696,16 @@ class ir_fields_converter(models.Model):
                     value,
                     {'moreinfo': action})
         elif subfield == 'id':
-            field_type = _("external id")
-            if '.' in value:
-                xmlid = value
-            else:
-                xmlid = "%s.%s" % (self._context.get('_import_current_module', ''), value)
-            try:
-                id = self.env.ref(xmlid).id
-            except ValueError:
-                pass # leave id is None
+            # external ids of the import are prefetched in bulk, only misses
+            # get here and they may have been created by an earlier row
+            resolved = self._resolve_external_ids(field.comodel_name, [value])
+            if value in resolved:
+                id, _ws = resolved[value]
         elif subfield is None:
-            field_type = _("name")
             ids = RelatedModel.name_search(name=value, operator='=')
             if ids:
-                if len(ids) > 1:
-                    warnings.append(ImportWarning(
-                        _("Found multiple matches for field '%%(field)s' (%d matches)")
-                        % (len(ids))))
+                warnings.extend(self._multiple_matches(len(ids)))
                 id, _name = ids[0]
-        else:
-            raise self._format_import_error(
-                Exception,
-                _("Unknown sub-field '%s'"),
-                subfield
-            )
 
         if id is None:
             raise self._format_import_error(
@@ -357,7 +713,24 @@ class ir_fields_converter(models.Model):
                 _("No matching record found for %(field_type)s '%(value)s' in field '%%(field)s'"),
                 {'field_type': field_type, 'value': value},
                 {'moreinfo': action})
-        return id, field_type, warnings
+        cache[key] = (id, warnings)
+        return id, field_type, list(warnings)
+
+    def _reference_type(self, subfield):
+        """ Returns the translated user-readable name of the referencing
+        subfield ``subfield``
+        """
+        if subfield == '.id':
+            return _("database id")
+        elif subfield == 'id':
+            return _("external id")
+        elif subfield is None:
+            return _("name")
+        raise self._format_import_error(
+            Exception,
+            _("Unknown sub-field '%s'"),
+            subfield
+        )
 
     def _referencing_subfield(self, record):
         """ Checks the record for the subfields allowing referencing (an
@@ -404,14 +777,14 @@ class ir_fields_converter(models.Model):
             id, _, ws = self.db_id_for(model, field, subfield, reference)
             ids.append(id)
             warnings.extend(ws)
-        return [REPLACE_WITH(ids)], warnings
+        return [(6, False, ids)], warnings
 
     @api.model
     def _str_to_one2many(self, model, field, records):
         commands = []
         warnings = []
 
-        if len(records) == 1 and exclude_ref_fields(records[0]) == {}:
+        if len(records) == 1 and REFERENCING_FIELDS.issuperset(records[0]):
             # only one row with only ref field, field=ref1,ref2,ref3 as in
             # m2o/m2m
             record = records[0]
@@ -430,7 +803,7 @@ class ir_fields_converter(models.Model):
 
         for record in records:
             id = None
-            refs = only_ref_fields(record)
+            refs, rest = partition_ref_fields(record)
             # there are ref fields in the record
             if refs:
                 subfield, w1 = self._referencing_subfield(refs)
@@ -439,11 +812,11 @@ class ir_fields_converter(models.Model):
                 id, _, w2 = self.db_id_for(model, field, subfield, reference)
                 warnings.extend(w2)
 
-            writable = convert(exclude_ref_fields(record), log)
+            writable = convert(rest, log)
             if id:
-                commands.append(LINK_TO(id))
-                commands.append(UPDATE(id, writable))
+                commands.append((4, id, False))
+                commands.append((1, id, writable))
             else:
-                commands.append(CREATE(writable))
+                commands.append((0, False, writable))
 
         return commands, warnings
@@ -430,4 +430,158 @@ class TestO2MSerialization(common.TransactionCase):
 
         self.assertEqual(results, [])
 
+
+class TestX2ManyWrite(common.TransactionCase):
+    """ test the orm method 'write' on one2many and many2many fields """
+
+    def setUp(self):
+        super(TestX2ManyWrite, self).setUp()
+        cr, uid = self.cr, self.uid
+        self.partner = self.registry('res.partner')
+        self.category = self.registry('res.partner.category')
+        self.parent = self.partner.create(cr, uid, {'name': 'Parent'})
+        self.other = self.partner.create(cr, uid, {'name': 'Other parent'})
+
+    def children(self, parent_id):
+        return set(self.partner.search(self.cr, UID, [('parent_id', '=', parent_id)]))
+
+    def categories(self, partner_id):
+        return set(self.category.search(self.cr, UID, [('partner_ids', 'in', [partner_id])]))
+
+    def test_o2m_mixed_commands(self):
+        " consecutive commands with the same code are applied together, in order "
+        cr, uid = self.cr, self.uid
+        c1, c2, c3 = [
+            self.partner.create(cr, uid, {'name': name, 'parent_id': self.parent})
+            for name in ['C1', 'C2', 'C3']
+        ]
+        f1, f2 = [self.partner.create(cr, uid, {'name': name}) for name in ['F1', 'F2']]
+
+        self.partner.write(cr, uid, [self.parent], {'child_ids': [
+            CREATE({'name': 'N1'}),
+            CREATE({'name': 'N2'}),
+            UPDATE(c1, {'name': 'U'}),
+            UPDATE(c2, {'name': 'U'}),
+            LINK_TO(f1),
+            LINK_TO(f2),
+            LINK_TO(c3),
+            DELETE(c3),
+            CREATE({'name': 'N3'}),
+        ]})
+
+        children = self.children(self.parent)
+        self.assertEqual(children & set([c1, c2, c3, f1, f2]), set([c1, c2, f1, f2]))
+        self.assertFalse(self.partner.exists(cr, uid, [c3]))
+        names = [p['name'] for p in self.partner.read(cr, uid, list(children), ['name'])]
+        self.assertEqual(sorted(names), ['F1', 'F2', 'N1', 'N2', 'N3', 'U', 'U'])
+
+    def test_o2m_store_triggers(self):
+        " the store triggers returned by set() contain no duplicates "
+        cr, uid = self.cr, self.uid
+        c1 = self.partner.create(cr, uid, {'name': 'C1', 'parent_id': self.parent})
+        column = self.partner._columns['child_ids']
+        result = column.set(cr, self.partner, self.parent, 'child_ids', [
+            CREATE({'name': 'N1'}),
+            UPDATE(c1, {'name': 'U'}),
+            CREATE({'name': 'N2'}),
+        ], uid, context={})
+        keys = [(priority, model, tuple(ids), tuple(fnames))
+                for priority, model, ids, fnames in result or []]
+        self.assertEqual(len(keys), len(set(keys)))
+
+    def test_o2m_FORGET_command(self):
+        " FORGET only detaches the records linked to the written record "
+        cr, uid = self.cr, self.uid
+        child = self.partner.create(cr, uid, {'name': 'Child', 'parent_id': self.parent})
+        foreign = self.partner.create(cr, uid, {'name': 'Foreign', 'parent_id': self.other})
+
+        self.partner.write(cr, uid, [self.parent], {'child_ids': [FORGET(child), FORGET(foreign)]})
+
+        self.assertEqual(self.children(self.parent), set())
+        self.assertEqual(self.children(self.other), set([foreign]))
+        self.assertTrue(self.partner.exists(cr, uid, [child]))
+
+    def test_o2m_REPLACE_WITH_command(self):
+        " REPLACE_WITH links the new records and detaches the others "
+        cr, uid = self.cr, self.uid
+        c1, c2 = [
+            self.partner.create(cr, uid, {'name': name, 'parent_id': self.parent})
+            for name in ['C1', 'C2']
+        ]
+        free = self.partner.create(cr, uid, {'name': 'Free'})
+
+        self.partner.write(cr, uid, [self.parent], {'child_ids': [REPLACE_WITH([c1, free])]})
+
+        self.assertEqual(self.children(self.parent), set([c1, free]))
+        self.assertTrue(self.partner.search(cr, uid, [('id', '=', c2), ('parent_id', '=', False)]))
+
+    @mute_logger('openerp.models')
+    def test_o2m_REPLACE_WITH_missing(self):
+        " REPLACE_WITH fails on records that do not exist "
+        cr, uid = self.cr, self.uid
+        child = self.partner.create(cr, uid, {'name': 'Child'})
+        missing = self.partner.create(cr, uid, {'name': 'Missing'})
+        self.partner.unlink(cr, uid, [missing])
+
+        with self.assertRaises(Exception):
+            self.partner.write(cr, uid, [self.parent], {'child_ids': [REPLACE_WITH([child, missing])]})
+
+    @mute_logger('openerp.models')
+    def test_o2m_LINK_TO_missing(self):
+        " LINK_TO fails on records that do not exist "
+        cr, uid = self.cr, self.uid
+        child = self.partner.create(cr, uid, {'name': 'Child'})
+        missing = self.partner.create(cr, uid, {'name': 'Missing'})
+        self.partner.unlink(cr, uid, [missing])
+
+        with self.assertRaises(Exception):
+            self.partner.write(cr, uid, [self.parent], {'child_ids': [LINK_TO(child), LINK_TO(missing)]})
+
+    def test_m2m_mixed_commands(self):
+        cr, uid = self.cr, self.uid
+        c1, c2, c3 = [self.category.create(cr, uid, {'name': name}) for name in ['C1', 'C2', 'C3']]
+
+        self.partner.write(cr, uid, [self.parent], {'category_id': [
+            LINK_TO(c1),
+            LINK_TO(c2),
+            FORGET(c1),
+            LINK_TO(c3),
+            LINK_TO(c3),
+        ]})
+
+        self.assertEqual(self.categories(self.parent), set([c2, c3]))
+
+    def test_m2m_REPLACE_WITH_command(self):
+        " REPLACE_WITH keeps the links to the records already linked "
+        cr, uid = self.cr, self.uid
+        c1, c2, c3 = [self.category.create(cr, uid, {'name': name}) for name in ['C1', 'C2', 'C3']]
+        self.partner.write(cr, uid, [self.parent], {'category_id': [REPLACE_WITH([c1, c2])]})
+
+        self.partner.write(cr, uid, [self.parent], {'category_id': [REPLACE_WITH([c2, c3])]})
+        self.assertEqual(self.categories(self.parent), set([c2, c3]))
+
+        self.partner.write(cr, uid, [self.parent], {'category_id': [REPLACE_WITH([])]})
+        self.assertEqual(self.categories(self.parent), set())
+
+    def test_m2m_REPLACE_WITH_rule(self):
+        " REPLACE_WITH keeps the links to the records the user cannot see "
+        cr, uid = self.cr, self.uid
+        c1, c2, c3 = [self.category.create(cr, uid, {'name': name}) for name in ['C1', 'C2', 'C3']]
+        self.partner.write(cr, uid, [self.parent], {'category_id': [REPLACE_WITH([c1, c2])]})
+
+        uid2 = self.registry('res.users').create(cr, uid, {
+            'name': 'test user',
+            'login': 'test',
+            'groups_id': [(6, 0, [self.ref('base.group_user'), self.ref('base.group_partner_manager')])],
+        })
+        category_model = self.registry('ir.model').search(cr, uid, [('model', '=', 'res.partner.category')])[0]
+        self.registry('ir.rule').create(cr, uid, {
+            'name': 'C1 is invisible',
+            'domain_force': "[('id', '!=', %d)]" % c1,
+            'model_id': category_model,
+        })
+
+        self.partner.write(cr, uid2, [self.parent], {'category_id': [REPLACE_WITH([c3])]})
+        self.assertEqual(self.categories(self.parent), set([c1, c3]))
+
 # vim:expandtab:smartindent:tabstop=4:softtabstop=4:shiftwidth=4:
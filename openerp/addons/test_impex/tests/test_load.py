@@ -585,6 +585,27 @@ class test_m2o(ImporterCase):
         b = self.browse()
         self.assertEqual(42, b[0].value.value)
 
+    def test_by_xid_deleted(self):
+        """ References resolved by an import must not leak into the next
+        """
+        ExportInteger = self.registry('export.integer')
+        integer_id = ExportInteger.create(
+            self.cr, openerp.SUPERUSER_ID, {'value': 42})
+        xid = self.xid(ExportInteger.browse(
+            self.cr, openerp.SUPERUSER_ID, [integer_id])[0])
+
+        result = self.import_(['value/id'], [[xid], [xid]])
+        self.assertFalse(result['messages'])
+        self.assertEqual(len(result['ids']), 2)
+
+        ExportInteger.unlink(self.cr, openerp.SUPERUSER_ID, [integer_id])
+        result = self.import_(['value/id'], [[xid]])
+        self.assertEqual(result['messages'], [message(
+            "No matching record found for external id '%s' "
+            "in field 'unknown'" % xid, moreinfo=moreaction(
+                res_model='ir.model.data', domain=[('model','=','export.integer')]))])
+        self.assertIs(result['ids'], False)
+
     def test_by_id(self):
         integer_id = self.registry('export.integer').create(
             self.cr, openerp.SUPERUSER_ID, {'value': 42})
@@ -1069,6 +1090,14 @@ class test_date(ImporterCase):
                     moreinfo="Use the format '2012-12-31'")])
         self.assertIs(result['ids'], False)
 
+    def test_nonexistent(self):
+        result = self.import_(['value'], [['2012-02-30']])
+        self.assertEqual(result['messages'], [
+            message("'2012-02-30' does not seem to be a valid date "
+                    "for field 'unknown'",
+                    moreinfo="Use the format '2012-12-31'")])
+        self.assertIs(result['ids'], False)
+
 class test_datetime(ImporterCase):
     model_name = 'export.datetime'
 
@@ -1171,3 +1200,16 @@ class test_unique(ImporterCase):
                  type='error', rows={'from': 4, 'to': 4},
                  record=4, field='value'),
         ])
+
+class test_convert_bulk(ImporterCase):
+    model_name = 'export.integer'
+
+    def test_convert(self):
+        Converter = self.registry('ir.fields.converter')
+        messages = []
+        result = Converter.for_model_bulk(
+            self.cr, openerp.SUPERUSER_ID, self.model, ['id', 'value'],
+            [['a', '42'], ['b', ''], ['c', 'foo']],
+            lambda index, field, error: messages.append((index, field)))
+        self.assertEqual(result, [{'value': 42}, {'value': False}, {}])
+        self.assertEqual(messages, [(2, 'value')])
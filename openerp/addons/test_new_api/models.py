@@ -86,6 +86,25 @@ class TestFunctionNoInfiniteRecursion(osv.Model):
             _compute_f1, type='char', string='Function Field', store=True),
     }
 
+
+class TestSparse(osv.Model):
+    _name = 'test_old_api.sparse'
+
+    _columns = {
+        'data': fields.serialized('Data'),
+        'name': fields.sparse(type='char', string='Name', serialization_field='data'),
+        'count': fields.sparse(type='integer', string='Count', serialization_field='data'),
+    }
+
+
+class TestProperty(osv.Model):
+    _name = 'test_old_api.property'
+
+    _columns = {
+        'name': fields.char('Name'),
+        'property_score': fields.property(type='integer', string='Score'),
+    }
+
 ##############################################################################
 #
 #    NEW API
@@ -3,6 +3,7 @@
 #
 import unittest
 
+from openerp import api
 from openerp.osv import fields
 from openerp.tests import common
 
@@ -125,6 +126,91 @@ class TestPropertyField(common.TransactionCase):
         self.assertEqual(self.partner.browse(cr, alice, partner_id).property_country.id, country_be, "Alice does not see the value he has set on the property field")
         self.assertEqual(self.partner.browse(cr, bob, partner_id).property_country.id, country_fr, "Changes made by Alice have overwritten Bob's value")
 
+    def test_2_property_write_multi(self):
+        """ write a property field on several records at once """
+        cr, uid = self.cr, self.uid
+        model = self.registry('test_old_api.property')
+        ids = [model.create(cr, uid, {'name': name}) for name in ['A', 'B', 'C']]
+
+        calls = []
+        @api.model
+        def set_multi(self, name, model, values):
+            calls.append(sorted(values))
+            return set_multi.origin(self, name, model, values)
+        self.property._patch_method('set_multi', set_multi)
+        self.addCleanup(self.property._revert_method, 'set_multi')
+
+        model.write(cr, uid, ids[:2], {'property_score': 5})
+        self.assertEqual(len(calls), 1, "The values should be set in a single call")
+        self.assertEqual(calls[0], sorted(ids[:2]), "The call should cover all the written records")
+
+        scores = {r['id']: r['property_score'] for r in model.read(cr, uid, ids, ['property_score'])}
+        self.assertEqual(scores, {ids[0]: 5, ids[1]: 5, ids[2]: False})
+
+
+class TestSparseField(common.TransactionCase):
+
+    def setUp(self):
+        super(TestSparseField, self).setUp()
+        self.sparse = self.registry('test_old_api.sparse')
+
+    def record_writes(self):
+        """ return the list of the (ids, values) written on the model from now on """
+        writes = []
+        @api.multi
+        def write(self, vals):
+            writes.append((sorted(self.ids), vals))
+            return write.origin(self, vals)
+        self.sparse._patch_method('write', write)
+        self.addCleanup(self.sparse._revert_method, 'write')
+        return writes
+
+    def read_values(self, ids):
+        return {r['id']: (r['name'], r['count'])
+                for r in self.sparse.read(self.cr, self.uid, ids, ['name', 'count'])}
+
+    def test_0_write_multi(self):
+        """ write a sparse field on records with different serialized values """
+        cr, uid = self.cr, self.uid
+        r1 = self.sparse.create(cr, uid, {'name': 'A', 'count': 1})
+        r2 = self.sparse.create(cr, uid, {'name': 'B', 'count': 2})
+
+        self.sparse.write(cr, uid, [r1, r2], {'count': 5})
+        self.assertEqual(self.read_values([r1, r2]), {r1: ('A', 5), r2: ('B', 5)})
+
+    def test_1_write_grouped(self):
+        """ the records ending up with the same serialized value are written together """
+        cr, uid = self.cr, self.uid
+        r1 = self.sparse.create(cr, uid, {'name': 'A', 'count': 1})
+        r2 = self.sparse.create(cr, uid, {'name': 'B', 'count': 2})
+        r3 = self.sparse.create(cr, uid, {'name': 'B', 'count': 3})
+
+        writes = self.record_writes()
+        column = self.sparse._columns['count']
+        column.set(cr, self.sparse, [r1, r2, r3], 'count', 7, user=uid, context={})
+
+        self.assertEqual(sorted(ids for ids, vals in writes), [[r1], sorted([r2, r3])])
+        self.assertEqual(self.read_values([r1, r2, r3]),
+                         {r1: ('A', 7), r2: ('B', 7), r3: ('B', 7)})
+
+    def test_2_write_unchanged(self):
+        """ writing the stored value, or unsetting an absent one, writes nothing """
+        cr, uid = self.cr, self.uid
+        r1 = self.sparse.create(cr, uid, {'name': 'A', 'count': 1})
+        r2 = self.sparse.create(cr, uid, {'name': 'B', 'count': 2})
+        r3 = self.sparse.create(cr, uid, {'count': 3})
+
+        writes = self.record_writes()
+        self.sparse._columns['count'].set(cr, self.sparse, [r1, r2], 'count', 1, user=uid, context={})
+        self.assertEqual([ids for ids, vals in writes], [[r2]])
+
+        del writes[:]
+        self.sparse._columns['name'].set(cr, self.sparse, [r1, r3], 'name', None, user=uid, context={})
+        self.assertEqual([ids for ids, vals in writes], [[r1]])
+        self.assertNotIn('name', self.sparse.browse(cr, uid, r1).data)
+        self.assertEqual(self.read_values([r1, r2, r3]),
+                         {r1: (False, 1), r2: ('B', 1), r3: (False, 3)})
+
 
 class TestHtmlField(common.TransactionCase):
 
@@ -1209,34 +1209,43 @@ class BaseModel(object, metaclass=MetaModel):
                 record.update(exception.args[1])
             log(record)
 
+        records = list(records)
         stream = CountingStream(records)
-        for record, extras in stream:
-            dbid = False
-            xid = False
-            # name_get/name_create
-            if None in record: pass
-            # xid
-            if 'id' in record:
-                xid = record['id']
-            # dbid
-            if '.id' in record:
-                try:
-                    dbid = int(record['.id'])
-                except ValueError:
-                    # in case of overridden id column
-                    dbid = record['.id']
-                if not self.search(cr, uid, [('id', '=', dbid)], context=context):
-                    log(dict(extras,
-                        type='error',
-                        record=stream.index,
-                        field='.id',
-                        message=_("Unknown database identifier '%s'") % dbid))
-                    dbid = False
-
-            converted = convert(record, lambda field, err:\
-                _log(dict(extras, record=stream.index, field=field_names[field]), field, err))
-
-            yield dbid, xid, converted, dict(extras, record=stream.index)
+        try:
+            # resolve the references of all records upfront rather than one
+            # query per cell during conversion
+            Converter.prefetch_references(
+                cr, uid, self, [record for record, _info in records],
+                context=context)
+            for record, extras in stream:
+                dbid = False
+                xid = False
+                # name_get/name_create
+                if None in record: pass
+                # xid
+                if 'id' in record:
+                    xid = record['id']
+                # dbid
+                if '.id' in record:
+                    try:
+                        dbid = int(record['.id'])
+                    except ValueError:
+                        # in case of overridden id column
+                        dbid = record['.id']
+                    if not self.search(cr, uid, [('id', '=', dbid)], context=context):
+                        log(dict(extras,
+                            type='error',
+                            record=stream.index,
+                            field='.id',
+                            message=_("Unknown database identifier '%s'") % dbid))
+                        dbid = False
+
+                converted = convert(record, lambda field, err:\
+                    _log(dict(extras, record=stream.index, field=field_names[field]), field, err))
+
+                yield dbid, xid, converted, dict(extras, record=stream.index)
+        finally:
+            Converter.clear_import_cache(cr, uid, context=context)
 
     @api.multi
     def _validate_fields(self, field_names):
@@ -3944,8 +3953,12 @@ class BaseModel(object, metaclass=MetaModel):
                 del rel_context[c[0]]
 
         for field in upd_todo:
+            column = self._columns[field]
+            if column._set_multi:
+                result += column.set(cr, self, ids, field, vals[field], user, context=rel_context) or []
+                continue
             for id in ids:
-                result += self._columns[field].set(cr, self, id, field, vals[field], user, context=rel_context) or []
+                result += column.set(cr, self, id, field, vals[field], user, context=rel_context) or []
 
         # for recomputing new-style fields
         recs.modified(upd_todo)
@@ -4464,16 +4477,17 @@ class BaseModel(object, metaclass=MetaModel):
                             if r in list(field_dict.keys()):
                                 if f in field_dict[r]:
                                     result.pop(r)
+                    placeholder, convert = column._symbol_set
+                    query = 'UPDATE "%s" SET "%s"=%s WHERE id = %%s' % (
+                        self._table, f, placeholder,
+                    )
                     for id, value in list(result.items()):
                         if column._type == 'many2one':
                             try:
                                 value = value[0]
                             except:
                                 pass
-                        query = 'UPDATE "%s" SET "%s"=%s WHERE id = %%s' % (
-                            self._table, f, column._symbol_set[0],
-                        )
-                        cr.execute(query, (column._symbol_set[1](value), id))
+                        cr.execute(query, (convert(value), id))
 
         # invalidate and mark new-style fields to recompute
         self.browse(cr, uid, ids, context).modified(fields)
@@ -42,6 +42,8 @@ import logging
 import pytz
 import re
 import xmlrpc.client
+from collections import defaultdict
+from itertools import groupby
 from operator import itemgetter
 from psycopg2 import Binary
 
@@ -53,6 +55,11 @@ from openerp.tools import float_repr, float_round, frozendict, html_sanitize
 import simplejson
 from openerp import SUPERUSER_ID
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # deprecated; kept for backward compatibility only
 _get_cursor = LazyCursor
 
@@ -67,6 +74,25 @@ def _symbol_set(symb):
         return symb
     return str(symb)
 
+@functools.lru_cache(maxsize=1024)
+def _update_query(table, column, placeholder='%s'):
+    """ Return the query that sets `column` on a row of `table`. """
+    return 'update '+table+' set '+column+'='+placeholder+' where id=%s'
+
+
+# default values of the _column parameters that are not explicit in __init__
+_COLUMN_DEFAULTS = {
+    'copy': True,
+    'help': '',
+    'write': False,
+    'read': False,
+    'selectable': True,
+    'group_operator': None,
+    'groups': None,
+    'deprecated': None,
+    '_prefetch': True,
+}
+
 
 class _column(object):
     """ Base of all fields, a database column
@@ -82,6 +108,7 @@ class _column(object):
     _type = 'unknown'
     _obj = None
     _multi = False
+    _set_multi = False          # whether set() accepts a list of ids
     _symbol_c = '%s'
     _symbol_f = _symbol_set
     _symbol_set = (_symbol_c, _symbol_f)
@@ -112,8 +139,20 @@ class _column(object):
         'deprecated',           # Optional deprecation warning
         '_args',
         '_prefetch',
+        '_field_args',          # cached result of to_field_args()
     ]
 
+    # names of the slots of the class and its bases, see __init_subclass__()
+    _slot_names = frozenset(__slots__)
+
+    def __init_subclass__(cls, **kwargs):
+        super(_column, cls).__init_subclass__(**kwargs)
+        cls._slot_names = frozenset(
+            name
+            for klass in cls.__mro__
+            for name in klass.__dict__.get('__slots__', ())
+        )
+
     def __init__(self, string='unknown', required=False, readonly=False, domain=[], context={}, states=None, priority=0, change_default=False, size=None, ondelete=None, translate=False, select=False, manual=False, **args):
         """
 
@@ -121,29 +160,28 @@ class _column(object):
         It corresponds to the 'state' column in ir_model_fields.
 
         """
-        # add parameters and default values
-        args['copy'] = args.get('copy', True)
-        args['string'] = string
-        args['help'] = args.get('help', '')
-        args['required'] = required
-        args['readonly'] = readonly
-        args['_domain'] = domain
-        args['_context'] = context
-        args['states'] = states
-        args['priority'] = priority
-        args['change_default'] = change_default
-        args['size'] = size
-        args['ondelete'] = ondelete.lower() if ondelete else None
-        args['translate'] = translate
-        args['select'] = select
-        args['manual'] = manual
-        args['write'] = args.get('write', False)
-        args['read'] = args.get('read', False)
-        args['selectable'] = args.get('selectable', True)
-        args['group_operator'] = args.get('group_operator', None)
-        args['groups'] = args.get('groups', None)
-        args['deprecated'] = args.get('deprecated', None)
-        args['_prefetch'] = args.get('_prefetch', True)
+        # assign slot attributes directly, without going through __setattr__;
+        # only the remaining parameters are set with setattr(), which stores
+        # unknown ones in self._args
+        attrs = {key: args.pop(key, val) for key, val in _COLUMN_DEFAULTS.items()}
+        attrs.update(
+            string=string,
+            required=required,
+            readonly=readonly,
+            _domain=domain,
+            _context=context,
+            states=states,
+            priority=priority,
+            change_default=change_default,
+            size=size,
+            ondelete=ondelete.lower() if ondelete else None,
+            translate=translate,
+            select=select,
+            manual=manual,
+            _field_args=None,
+        )
+        for key, val in attrs.items():
+            object.__setattr__(self, key, val)
 
         self._args = EMPTY_DICT
         for key, val in args.items():
@@ -164,13 +202,14 @@ class _column(object):
 
     def __setattr__(self, name, value):
         """ Set a slot or non-slot attribute. """
-        try:
+        if name in self._slot_names:
             object.__setattr__(self, name, value)
-        except AttributeError:
-            if self._args:
-                self._args[name] = value
-            else:
-                self._args = {name: value}     # replace EMPTY_DICT
+        elif self._args:
+            self._args[name] = value
+        else:
+            self._args = {name: value}     # replace EMPTY_DICT
+        # the field arguments depend on the attributes
+        object.__setattr__(self, '_field_args', None)
 
     def __delattr__(self, name):
         """ Remove a non-slot attribute. """
@@ -178,6 +217,7 @@ class _column(object):
             del self._args[name]
         except KeyError:
             raise AttributeError(name)
+        object.__setattr__(self, '_field_args', None)
 
     def new(self, _computed_field=False, **args):
         """ Return a column like `self` with the given parameters; the parameter
@@ -186,43 +226,58 @@ class _column(object):
         # memory optimization: reuse self whenever possible; you can reduce the
         # average memory usage per registry by 10 megabytes!
         column = type(self)(**args)
-        return self if self.to_field_args() == column.to_field_args() else column
+        return self if self._get_field_args() == column._get_field_args() else column
 
     def to_field(self):
         """ convert column `self` to a new-style field """
         from openerp.fields import Field
-        return Field.by_type[self._type](column=self, **self.to_field_args())
+        return Field.by_type[self._type](column=self, **self._get_field_args())
+
+    def _get_field_args(self):
+        """ return the result of :meth:`to_field_args`, computed once until
+            an attribute of `self` is modified; the result must not be modified
+        """
+        if self._field_args is None:
+            object.__setattr__(self, '_field_args', self.to_field_args())
+        return self._field_args
 
     def to_field_args(self):
         """ return a dictionary with all the arguments to pass to the field """
-        base_items = [
-            ('copy', self.copy),
-            ('index', self.select),
-            ('manual', self.manual),
-            ('string', self.string),
-            ('help', self.help),
-            ('readonly', self.readonly),
-            ('required', self.required),
-            ('states', self.states),
-            ('groups', self.groups),
-            ('change_default', self.change_default),
-            ('deprecated', self.deprecated),
-        ]
-        truthy_items = list(filter(itemgetter(1), [
-            ('group_operator', self.group_operator),
-            ('size', self.size),
-            ('ondelete', self.ondelete),
-            ('translate', self.translate),
-            ('domain', self._domain),
-            ('context', self._context),
-        ]))
-        return dict(base_items + truthy_items + list(self._args.items()))
+        args = {
+            'copy': self.copy,
+            'index': self.select,
+            'manual': self.manual,
+            'string': self.string,
+            'help': self.help,
+            'readonly': self.readonly,
+            'required': self.required,
+            'states': self.states,
+            'groups': self.groups,
+            'change_default': self.change_default,
+            'deprecated': self.deprecated,
+        }
+        # the following arguments are only given when they are set
+        if self.group_operator:
+            args['group_operator'] = self.group_operator
+        if self.size:
+            args['size'] = self.size
+        if self.ondelete:
+            args['ondelete'] = self.ondelete
+        if self.translate:
+            args['translate'] = self.translate
+        if self._domain:
+            args['domain'] = self._domain
+        if self._context:
+            args['context'] = self._context
+        args.update(self._args)
+        return args
 
     def restart(self):
         pass
 
     def set(self, cr, obj, id, name, value, user=None, context=None):
-        cr.execute('update '+obj._table+' set '+name+'='+self._symbol_set[0]+' where id=%s', (self._symbol_set[1](value), id))
+        placeholder, convert = self._symbol_set
+        cr.execute(_update_query(obj._table, name, placeholder), (convert(value), id))
 
     def get(self, cr, obj, ids, name, user=None, offset=0, context=None, values=None):
         raise Exception(_('undefined get method !'))
@@ -297,18 +352,28 @@ class reference(_column):
 
     def get(self, cr, obj, ids, name, uid=None, context=None, values=None):
         result = {}
-        # copy initial values fetched previously.
+        # copy initial values fetched previously, and group targets by model
+        targets = defaultdict(list)
         for value in values:
             result[value['id']] = value[name]
             if value[name]:
                 model, res_id = value[name].split(',')
-                if not obj.pool[model].exists(cr, uid, [int(res_id)], context=context):
-                    result[value['id']] = False
+                targets[model].append((value['id'], int(res_id)))
+        # check the existence of targets with one query per model
+        for model, pairs in targets.items():
+            res_ids = list(set(res_id for id, res_id in pairs))
+            existing = set(obj.pool[model].exists(cr, uid, res_ids, context=context))
+            for id, res_id in pairs:
+                if res_id not in existing:
+                    result[id] = False
         return result
 
     @classmethod
     def _as_display_name(cls, field, cr, uid, obj, value, context=None):
-        if value:
+        if isinstance(value, tuple):
+            # already converted to a (id, name) pair
+            return value[1]
+        if value and isinstance(value, str):
             # reference fields have a 'model,id'-like value, that we need to convert
             # to a real name
             model_name, res_id = value.split(',')
@@ -335,12 +400,14 @@ def _symbol_set_char(self, symb):
 
 class char(_column):
     _type = 'char'
-    __slots__ = ['_symbol_f', '_symbol_set', '_symbol_set_char']
+    __slots__ = ['_symbol_f', '_symbol_set']
+
+    # method _symbol_set_char kept for backward compatibility
+    _symbol_set_char = _symbol_set_char
 
     def __init__(self, string="unknown", size=None, **args):
         _column.__init__(self, string=string, size=size or None, **args)
-        # self._symbol_set_char defined to keep the backward compatibility
-        self._symbol_f = self._symbol_set_char = lambda x: _symbol_set_char(self, x)
+        self._symbol_f = self._symbol_set_char
         self._symbol_set = (self._symbol_c, self._symbol_f)
 
 class text(_column):
@@ -348,6 +415,15 @@ class text(_column):
     __slots__ = []
 
 
+# the same html contents are often written over and over (templates,
+# signatures); keep the sanitized result of small values, so that the cache
+# holds at most a few megabytes
+_SANITIZE_CACHE_MAX_SIZE = 4 * 1024
+
+@functools.lru_cache(maxsize=512)
+def _html_sanitize_cached(value, strip_style):
+    return html_sanitize(value, strip_style=strip_style)
+
 class html(text):
     _type = 'html'
     _symbol_c = '%s'
@@ -358,6 +434,8 @@ class html(text):
             return None
         if not self._sanitize:
             return value
+        if isinstance(value, str) and len(value) <= _SANITIZE_CACHE_MAX_SIZE:
+            return _html_sanitize_cached(value, self._strip_style)
         return html_sanitize(value, strip_style=self._strip_style)
 
     def __init__(self, string='unknown', sanitize=True, strip_style=False, **args):
@@ -378,7 +456,8 @@ import builtins
 
 def _symbol_set_float(self, x):
     result = builtins.float(x or 0.0)
-    digits = self.digits
+    # only go through the property when digits have to be computed
+    digits = self.digits if self._digits_compute else self._digits
     if digits:
         precision, scale = digits
         result = float_repr(float_round(result, precision_digits=scale), precision_digits=scale)
@@ -390,6 +469,8 @@ class float(_column):
     _symbol_get = lambda self,x: x or 0.0
     __slots__ = ['_digits', '_digits_compute', '_symbol_f', '_symbol_set']
 
+    _symbol_set_float = _symbol_set_float
+
     @property
     def digits(self):
         if self._digits_compute:
@@ -403,7 +484,7 @@ class float(_column):
         # synopsis: digits_compute(cr) ->  (precision, scale)
         self._digits = digits
         self._digits_compute = digits_compute
-        self._symbol_f = lambda x: _symbol_set_float(self, x)
+        self._symbol_f = self._symbol_set_float
         self._symbol_set = (self._symbol_c, self._symbol_f)
 
     def to_field_args(self):
@@ -414,6 +495,31 @@ class float(_column):
     def digits_change(self, cr):
         pass
 
+# timezone names are resolved by pytz on every call; memoize the result
+_timezone = functools.lru_cache(maxsize=128)(pytz.timezone)
+
+# length of the values in the server date and datetime formats
+_SERVER_FORMAT_LENGTH = {
+    tools.DEFAULT_SERVER_DATE_FORMAT: 10,
+    tools.DEFAULT_SERVER_DATETIME_FORMAT: 19,
+}
+
+def _parse_server_datetime(value, format):
+    """ Parse `value` expressed in the server date or datetime `format`, and
+        return a naive datetime. Values of the expected length are parsed with
+        the much faster ``fromisoformat``; ``strptime`` handles the others,
+        and raises on invalid ones.
+    """
+    # fromisoformat() also accepts week dates, other separators and offsets
+    if (len(value) == _SERVER_FORMAT_LENGTH.get(format)
+            and value[4] == value[7] == '-' and value[10:11] in ('', ' ')
+            and value[13:14] == value[16:17] in ('', ':')):
+        try:
+            return DT.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return DT.datetime.strptime(value, format)
+
 class date(_column):
     _type = 'date'
     __slots__ = []
@@ -471,8 +577,8 @@ class date(_column):
             tz_name = user.tz
         if tz_name:
             try:
-                utc = pytz.timezone('UTC')
-                context_tz = pytz.timezone(tz_name)
+                utc = pytz.utc
+                context_tz = _timezone(tz_name)
                 utc_today = utc.localize(today, is_dst=False) # UTC = no DST
                 context_today = utc_today.astimezone(context_tz)
             except Exception:
@@ -490,14 +596,14 @@ class date(_column):
         :param str userdate: date string in in user time zone
         :return: UTC datetime string for server-side use
         """
-        user_date = DT.datetime.strptime(userdate, tools.DEFAULT_SERVER_DATE_FORMAT)
+        user_date = _parse_server_datetime(userdate, tools.DEFAULT_SERVER_DATE_FORMAT)
         if context and context.get('tz'):
             tz_name = context['tz']
         else:
             tz_name = model.pool.get('res.users').read(cr, SUPERUSER_ID, uid, ['tz'])['tz']
         if tz_name:
-            utc = pytz.timezone('UTC')
-            context_tz = pytz.timezone(tz_name)
+            utc = pytz.utc
+            context_tz = _timezone(tz_name)
             user_datetime = user_date + DT.timedelta(hours=12.0)
             local_timestamp = context_tz.localize(user_datetime, is_dst=False)
             user_datetime = local_timestamp.astimezone(utc)
@@ -562,7 +668,7 @@ class datetime(_column):
         utc_timestamp = pytz.utc.localize(timestamp, is_dst=False) # UTC = no DST
         if tz_name:
             try:
-                context_tz = pytz.timezone(tz_name)
+                context_tz = _timezone(tz_name)
                 return utc_timestamp.astimezone(context_tz)
             except Exception:
                 _logger.debug("failed to compute context/client-specific timestamp, "
@@ -572,7 +678,7 @@ class datetime(_column):
 
     @classmethod
     def _as_display_name(cls, field, cr, uid, obj, value, context=None):
-        value = datetime.context_timestamp(cr, uid, DT.datetime.strptime(value, tools.DEFAULT_SERVER_DATETIME_FORMAT), context=context)
+        value = datetime.context_timestamp(cr, uid, _parse_server_datetime(value, tools.DEFAULT_SERVER_DATETIME_FORMAT), context=context)
         return tools.ustr(value.strftime(tools.DEFAULT_SERVER_DATETIME_FORMAT))
 
 class binary(_column):
@@ -602,19 +708,16 @@ class binary(_column):
         if not values:
             values = []
         res = {}
+        values_by_id = {v['id']: v[name] for v in values}
+        # If client is requesting only the size of the field, we return it instead
+        # of the content. Presumably a separate request will be done to read the actual
+        # content if it's needed at some point.
+        # TODO: after 6.0 we should consider returning a dict with size and content instead of
+        #       having an implicit convention for the value
+        bin_size = context.get('bin_size_%s' % name, context.get('bin_size'))
         for i in ids:
-            val = None
-            for v in values:
-                if v['id'] == i:
-                    val = v[name]
-                    break
-
-            # If client is requesting only the size of the field, we return it instead
-            # of the content. Presumably a separate request will be done to read the actual
-            # content if it's needed at some point.
-            # TODO: after 6.0 we should consider returning a dict with size and content instead of
-            #       having an implicit convention for the value
-            if val and context.get('bin_size_%s' % name, context.get('bin_size')):
+            val = values_by_id.get(i)
+            if val and bin_size:
                 res[i] = tools.human_size(int(val))
             else:
                 res[i] = val
@@ -654,9 +757,7 @@ class selection(_column):
 
         # field_to_dict isn't given a field name, only a field object, we
         # need to get the name back in order to perform the translation lookup
-        field_name = next(
-            name for name, column in model._columns.items()
-            if column == field)
+        field_name = cls._column_name(model, field)
 
         translation_filter = "%s,%s" % (model._name, field_name)
         translate = functools.partial(
@@ -668,6 +769,19 @@ class selection(_column):
             for value, label in field.selection
         ]
 
+    @staticmethod
+    def _column_name(model, column):
+        """ Return the name of `column` in `model`, using a reverse index of
+            ``model._columns`` that is rebuilt whenever it is stale.
+        """
+        names = getattr(model, '_column_names', None) or {}
+        name = names.get(id(column))
+        if name is None or model._columns.get(name) is not column:
+            names = {id(col): key for key, col in model._columns.items()}
+            model._column_names = names
+            name = names[id(column)]
+        return name
+
 # ---------------------------------------------------------
 # Relationals fields
 # ---------------------------------------------------------
@@ -708,24 +822,29 @@ class many2one(_column):
             context = {}
         obj = obj_src.pool[self._obj]
         self._table = obj._table
-        if type(values) == type([]):
+        query = _update_query(obj_src._table, field)
+        if isinstance(values, list):
+            # all commands target the same row, so only the last value of the
+            # column matters: update it once, or before deleting a target row
+            value, dirty = None, False
             for act in values:
                 if act[0] == 0:
-                    id_new = obj.create(cr, act[2])
-                    cr.execute('update '+obj_src._table+' set '+field+'=%s where id=%s', (id_new, id))
+                    value, dirty = obj.create(cr, act[2]), True
                 elif act[0] == 1:
                     obj.write(cr, [act[1]], act[2], context=context)
                 elif act[0] == 2:
+                    if dirty:
+                        cr.execute(query, (value, id))
+                        dirty = False
                     cr.execute('delete from '+self._table+' where id=%s', (act[1],))
-                elif act[0] == 3 or act[0] == 5:
-                    cr.execute('update '+obj_src._table+' set '+field+'=null where id=%s', (id,))
+                elif act[0] in (3, 5):
+                    value, dirty = None, True
                 elif act[0] == 4:
-                    cr.execute('update '+obj_src._table+' set '+field+'=%s where id=%s', (act[1], id))
+                    value, dirty = act[1], True
+            if dirty:
+                cr.execute(query, (value, id))
         else:
-            if values:
-                cr.execute('update '+obj_src._table+' set '+field+'=%s where id=%s', (values, id))
-            else:
-                cr.execute('update '+obj_src._table+' set '+field+'=null where id=%s', (id,))
+            cr.execute(query, (values or None, id))
 
     def search(self, cr, obj, args, name, value, offset=0, limit=None, uid=None, context=None):
         return obj.pool[self._obj].search(cr, uid, args+self._domain+[('name', 'like', value)], offset, limit, context=context)
@@ -775,15 +894,18 @@ class one2many(_column):
         records = comodel.search(domain, limit=self._limit)
 
         result = {id: [] for id in ids}
+        append = {id: result[id].append for id in result}
         # read the inverse of records without prefetching other fields on them
         for record in records.with_context(prefetch_fields=False):
             # record[inverse] may be a record or an integer
-            result[int(record[inverse])].append(record.id)
+            append[int(record[inverse])](record.id)
 
         return result
 
     def set(self, cr, obj, id, field, values, user=None, context=None):
         result = []
+        # the comodel's methods may alter the context they get; copy it so
+        # that the caller and the following commands do not see it
         context = dict(context or {})
         context.update(self._context)
         if not values:
@@ -793,51 +915,98 @@ class one2many(_column):
         rec = obj.browse(cr, user, [], context=context)
         with rec.env.norecompute():
             _table = obj._table
-            for act in values:
-                if act[0] == 0:
-                    act[2][self._fields_id] = id
-                    id_new = obj.create(cr, user, act[2], context=context)
-                    result += obj._store_get_values(cr, user, [id_new], list(act[2].keys()), context)
-                elif act[0] == 1:
-                    obj.write(cr, user, [act[1]], act[2], context=context)
-                elif act[0] == 2:
-                    obj.unlink(cr, user, [act[1]], context=context)
-                elif act[0] == 3:
-                    inverse_field = obj._fields.get(self._fields_id)
+            inverse = self._fields_id
+            inverse_field = obj._fields.get(inverse)
+            extra_domain = None
+            # process consecutive commands with the same code together
+            for code, acts in groupby(values, key=itemgetter(0)):
+                if code == 0:
+                    # create the records one by one: create() takes care of
+                    # defaults, constraints, translations and parent_store
+                    new_ids, new_fields = [], set()
+                    for act in acts:
+                        act[2][inverse] = id
+                        new_ids.append(obj.create(cr, user, act[2], context=context))
+                        new_fields.update(act[2])
+                    # collect the store triggers of the created records at once
+                    result += obj._store_get_values(cr, user, new_ids, list(new_fields), context)
+                elif code == 1:
+                    # write consecutive equal values on all their records at once
+                    for vals, group in groupby(acts, key=itemgetter(2)):
+                        obj.write(cr, user, [act[1] for act in group], vals, context=context)
+                elif code == 2:
+                    obj.unlink(cr, user, list(set(act[1] for act in acts)), context=context)
+                elif code == 3:
                     assert inverse_field, 'Trying to unlink the content of a o2m but the pointed model does not have a m2o'
-                    # if the model has on delete cascade, just delete the row
+                    ids_to_unlink = list(set(act[1] for act in acts))
+                    # if the model has on delete cascade, just delete the rows
                     if inverse_field.ondelete == "cascade":
-                        obj.unlink(cr, user, [act[1]], context=context)
+                        obj.unlink(cr, user, ids_to_unlink, context=context)
                     else:
-                        cr.execute('update '+_table+' set '+self._fields_id+'=null where id=%s', (act[1],))
-                elif act[0] == 4:
-                    # check whether the given record is already linked
-                    rec = obj.browse(cr, SUPERUSER_ID, act[1], {'prefetch_fields': False})
-                    if int(rec[self._fields_id]) != id:
+                        cr.execute('update '+_table+' set '+inverse+'=null where id = ANY(%s) and '+inverse+'=%s',
+                                   (ids_to_unlink, id))
+                elif code == 4:
+                    # find the given records that are not linked yet
+                    ids2 = set(act[1] for act in acts)
+                    cr.execute('select id, '+inverse+' is not distinct from %s from '+_table+' where id = ANY(%s)',
+                               (id, list(ids2)))
+                    ids_to_link, found = [], set()
+                    for rid, linked in cr.fetchall():
+                        found.add(rid)
+                        if not linked:
+                            ids_to_link.append(rid)
+                    # let write() raise for the given records that do not exist
+                    ids_to_link.extend(ids2 - found)
+                    if ids_to_link:
                         # Must use write() to recompute parent_store structure if needed and check access rules
-                        obj.write(cr, user, [act[1]], {self._fields_id:id}, context=context or {})
-                elif act[0] == 5:
-                    inverse_field = obj._fields.get(self._fields_id)
+                        obj.write(cr, user, ids_to_link, {inverse:id}, context=context)
+                elif code == 5:
                     assert inverse_field, 'Trying to unlink the content of a o2m but the pointed model does not have a m2o'
-                    # if the o2m has a static domain we must respect it when unlinking
-                    domain = (self._domain(original_obj)
-                              if callable(self._domain) else self._domain)
-                    extra_domain = domain or []
-                    ids_to_unlink = obj.search(cr, user, [(self._fields_id,'=',id)] + extra_domain, context=context)
+                    if extra_domain is None:
+                        # if the o2m has a static domain we must respect it when unlinking
+                        domain = (self._domain(original_obj)
+                                  if callable(self._domain) else self._domain)
+                        extra_domain = domain or []
+                    # all the commands of the run have the same effect
+                    ids_to_unlink = obj.search(cr, user, [(inverse,'=',id)] + extra_domain, context=context)
                     # If the model has cascade deletion, we delete the rows because it is the intended behavior,
                     # otherwise we only nullify the reverse foreign key column.
-                    if inverse_field.ondelete == "cascade":
+                    if ids_to_unlink and inverse_field.ondelete == "cascade":
                         obj.unlink(cr, user, ids_to_unlink, context=context)
-                    else:
-                        obj.write(cr, user, ids_to_unlink, {self._fields_id: False}, context=context)
-                elif act[0] == 6:
-                    # Must use write() to recompute parent_store structure if needed
-                    obj.write(cr, user, act[2], {self._fields_id:id}, context=context or {})
-                    ids2 = act[2] or [0]
-                    cr.execute('select id from '+_table+' where '+self._fields_id+'=%s and id <> ALL (%s)', (id,ids2))
-                    ids3 = [x[0] for x in cr.fetchall()]
-                    obj.write(cr, user, ids3, {self._fields_id:False}, context=context or {})
-        return result
+                    elif ids_to_unlink:
+                        obj.write(cr, user, ids_to_unlink, {inverse: False}, context=context)
+                elif code == 6:
+                    for act in acts:
+                        # read the given records and the ones currently linked,
+                        # and only write on those whose link has to change
+                        ids2 = set(act[2] or [])
+                        cr.execute('select id, '+inverse+' is not distinct from %s from '+_table+' where id = ANY(%s) or '+inverse+'=%s',
+                                   (id, list(ids2) or [0], id))
+                        ids_to_link, ids3, found = [], [], set()
+                        for rid, linked in cr.fetchall():
+                            if rid in ids2:
+                                found.add(rid)
+                                if not linked:
+                                    ids_to_link.append(rid)
+                            else:
+                                ids3.append(rid)
+                        # let write() raise for the given records that do not exist
+                        ids_to_link.extend(ids2 - found)
+                        # Must use write() to recompute parent_store structure if needed
+                        if ids_to_link:
+                            obj.write(cr, user, ids_to_link, {inverse:id}, context=context)
+                        if ids3:
+                            obj.write(cr, user, ids3, {inverse:False}, context=context)
+
+        # several runs of creates may return the same store triggers; the
+        # caller recomputes each of them once anyway
+        unique_result, seen = [], set()
+        for priority, model_name, ids, fnames in result:
+            key = (priority, model_name, tuple(ids), tuple(fnames))
+            if key not in seen:
+                seen.add(key)
+                unique_result.append((priority, model_name, ids, fnames))
+        return unique_result
 
     def search(self, cr, obj, args, name, value, offset=0, limit=None, uid=None, operator='like', context=None):
         domain = self._domain(obj) if callable(self._domain) else self._domain
@@ -847,6 +1016,21 @@ class one2many(_column):
     def _as_display_name(cls, field, cr, uid, obj, value, context=None):
         raise NotImplementedError('One2Many columns should not be used as record name (_rec_name)') 
 
+@functools.lru_cache(maxsize=256)
+def _relation_queries(rel, id1, id2):
+    """ Return the queries that insert a row, link a list of ids, and delete a
+        list of ids in the many2many relation table `rel`.
+    """
+    insert_query = 'insert into '+rel+' ('+id1+','+id2+') values (%s,%s)'
+    # beware of duplicates when inserting; the anti-join probes the
+    # index of the relation instead of sorting both sides like EXCEPT
+    link_query = """ INSERT INTO {rel} ({id1}, {id2})
+                    SELECT %s, ids.x FROM (SELECT DISTINCT unnest(%s) AS x) AS ids
+                    WHERE NOT EXISTS (SELECT 1 FROM {rel} WHERE {id1}=%s AND {id2}=ids.x)
+                 """.format(rel=rel, id1=id1, id2=id2)
+    delete_query = 'delete from '+rel+' where ' + id1 + '=%s and '+ id2 + ' = ANY(%s)'
+    return insert_query, link_query, delete_query
+
 #
 # Values: (0, 0,  { fields })    create
 #         (1, ID, { fields })    update (write fields to ID)
@@ -887,7 +1071,7 @@ class many2many(_column):
     _classic_write = False
     _type = 'many2many'
 
-    __slots__ = ['_obj', '_rel', '_id1', '_id2', '_limit', '_auto_join']
+    __slots__ = ['_obj', '_rel', '_id1', '_id2', '_limit', '_auto_join', '_sql_names_cache']
 
     def __init__(self, obj, rel=None, id1=None, id2=None, string='unknown', limit=None, **args):
         """
@@ -903,6 +1087,7 @@ class many2many(_column):
         self._id2 = id2
         self._limit = limit
         self._auto_join = False
+        self._sql_names_cache = {}
 
     def to_field_args(self):
         args = super(many2many, self).to_field_args()
@@ -922,8 +1107,13 @@ class many2many(_column):
         """
         tbl, col1, col2 = self._rel, self._id1, self._id2
         if not all((tbl, col1, col2)):
-            # the default table name is based on the stable alphabetical order of tables
+            # the default names only depend on the tables of both models
             dest_model = source_model.pool[self._obj]
+            key = (source_model._table, dest_model._table, tbl, col1, col2)
+            names = self._sql_names_cache.get(key)
+            if names:
+                return names
+            # the default table name is based on the stable alphabetical order of tables
             tables = tuple(sorted([source_model._table, dest_model._table]))
             if not tbl:
                 assert tables[0] != tables[1], 'Implicit/Canonical naming of m2m relationship table '\
@@ -934,6 +1124,7 @@ class many2many(_column):
                 col1 = '%s_id' % source_model._table
             if not col2:
                 col2 = '%s_id' % dest_model._table
+            self._sql_names_cache[key] = (tbl, col1, col2)
         return tbl, col1, col2
 
     def _get_query_and_where_params(self, cr, model, ids, values, where_params):
@@ -955,11 +1146,9 @@ class many2many(_column):
             context = {}
         if not values:
             values = {}
-        res = {}
         if not ids:
-            return res
-        for id in ids:
-            res[id] = []
+            return {}
+        res = {id: [] for id in ids}
         if offset:
             _logger.warning(
                 "Specifying offset at a many2many.get() is deprecated and may"
@@ -995,8 +1184,9 @@ class many2many(_column):
                 }, where_params)
 
         cr.execute(query, [tuple(ids),] + where_params)
-        for r in cr.fetchall():
-            res[r[1]].append(r[0])
+        append = {id: res[id].append for id in res}
+        for id2_value, id1_value in cr.fetchall():
+            append[id1_value](id2_value)
         return res
 
     def set(self, cr, model, id, name, values, user=None, context=None):
@@ -1007,17 +1197,19 @@ class many2many(_column):
         rel, id1, id2 = self._sql_names(model)
         obj = model.pool[self._obj]
 
+        insert_query, link_query, delete_query = _relation_queries(rel, id1, id2)
+
         def link(ids):
-            # beware of duplicates when inserting
-            query = """ INSERT INTO {rel} ({id1}, {id2})
-                        (SELECT %s, unnest(%s)) EXCEPT (SELECT {id1}, {id2} FROM {rel} WHERE {id1}=%s)
-                    """.format(rel=rel, id1=id1, id2=id2)
             for sub_ids in cr.split_for_in_conditions(ids):
-                cr.execute(query, (id, list(sub_ids), id))
+                cr.execute(link_query, (id, list(sub_ids), id))
 
-        def unlink_all():
-            # remove all records for which user has access rights
+        def unlink_all(keep_ids=None):
+            # remove all records for which user has access rights, except
+            # the ones in keep_ids
             clauses, params, tables = obj.pool.get('ir.rule').domain_get(cr, user, obj._name, context=context)
+            if keep_ids:
+                clauses = clauses + ['{rel}.{id2} <> ALL(%s)'.format(rel=rel, id2=id2)]
+                params = params + [list(keep_ids)]
             cond = " AND ".join(clauses) if clauses else "1=1"
             query = """ DELETE FROM {rel} USING {tables}
                         WHERE {rel}.{id1}=%s AND {rel}.{id2}={table}.id AND {cond}
@@ -1025,25 +1217,30 @@ class many2many(_column):
                                table=obj._table, tables=','.join(tables), cond=cond)
             cr.execute(query, [id] + params)
 
-        for act in values:
-            if not (isinstance(act, list) or isinstance(act, tuple)) or not act:
-                continue
-            if act[0] == 0:
-                idnew = obj.create(cr, user, act[2], context=context)
-                cr.execute('insert into '+rel+' ('+id1+','+id2+') values (%s,%s)', (id, idnew))
-            elif act[0] == 1:
-                obj.write(cr, user, [act[1]], act[2], context=context)
-            elif act[0] == 2:
-                obj.unlink(cr, user, [act[1]], context=context)
-            elif act[0] == 3:
-                cr.execute('delete from '+rel+' where ' + id1 + '=%s and '+ id2 + '=%s', (id, act[1]))
-            elif act[0] == 4:
-                link([act[1]])
-            elif act[0] == 5:
+        # process consecutive commands with the same code together
+        values = [act for act in values if isinstance(act, (list, tuple)) and act]
+        for code, acts in groupby(values, key=itemgetter(0)):
+            if code == 0:
+                for act in acts:
+                    idnew = obj.create(cr, user, act[2], context=context)
+                    cr.execute(insert_query, (id, idnew))
+            elif code == 1:
+                # write consecutive equal values on all their records at once
+                for vals, group in groupby(acts, key=itemgetter(2)):
+                    obj.write(cr, user, [act[1] for act in group], vals, context=context)
+            elif code == 2:
+                obj.unlink(cr, user, list(set(act[1] for act in acts)), context=context)
+            elif code == 3:
+                cr.execute(delete_query, (id, [act[1] for act in acts]))
+            elif code == 4:
+                link([act[1] for act in acts])
+            elif code == 5:
                 unlink_all()
-            elif act[0] == 6:
-                unlink_all()
-                link(act[2])
+            elif code == 6:
+                for act in acts:
+                    # only delete and insert the links that actually change
+                    unlink_all(keep_ids=act[2])
+                    link(act[2])
 
     #
     # TODO: use a name_search
@@ -1095,7 +1292,9 @@ def sanitize_binary_value(value):
     # So check for low bytes values, and if any, perform
     # base64 encoding - not very smart or useful, but this is
     # our last resort to avoid crashing the request.
-    if invalid_xml_low_bytes.search(value):
+    # Printable strings (like base64 data) cannot contain any of them, and
+    # str.isprintable() checks it faster than the regular expression.
+    if not value.isprintable() and invalid_xml_low_bytes.search(value):
         # b64-encode after restoring the pure bytes with latin-1
         # passthrough encoding
         value = base64.b64encode(value.encode('latin-1'))
@@ -1380,14 +1579,14 @@ class function(_column):
 
         if type == 'char':
             self._symbol_c = char._symbol_c
-            self._symbol_f = lambda x: _symbol_set_char(self, x)
+            self._symbol_f = functools.partial(_symbol_set_char, self)
             self._symbol_set = (self._symbol_c, self._symbol_f)
         elif type == 'float':
             self._symbol_c = float._symbol_c
-            self._symbol_f = lambda x: _symbol_set_float(self, x)
+            self._symbol_f = functools.partial(_symbol_set_float, self)
             self._symbol_set = (self._symbol_c, self._symbol_f)
         else:
-            type_class = globals().get(type)
+            type_class = _COLUMN_BY_TYPE.get(type)
             if type_class is not None:
                 self._symbol_c = type_class._symbol_c
                 self._symbol_f = type_class._symbol_f
@@ -1396,7 +1595,7 @@ class function(_column):
     def new(self, _computed_field=False, **args):
         if _computed_field:
             # field is computed, we need an instance of a non-function column
-            type_class = globals()[self._type]
+            type_class = _COLUMN_BY_TYPE[self._type]
             return type_class(**args)
         else:
             # HACK: function fields are tricky to recreate, simply return a copy
@@ -1434,30 +1633,30 @@ class function(_column):
         if context is None:
             context = {}
 
-        field_type = obj._columns[field]._type
-        new_values = dict(values)
+        # only binary values are converted; others are returned as a copy, as
+        # callers like _store_set_values() modify the result
+        if obj._columns[field]._type != 'binary':
+            return dict(values)
 
-        if field_type == 'binary':
-            if context.get('bin_size'):
-                # client requests only the size of binary fields
-                for rid, value in values.items():
-                    if value:
-                        new_values[rid] = get_nice_size(value)
-            elif not context.get('bin_raw'):
-                for rid, value in values.items():
-                    if value:
-                        new_values[rid] = sanitize_binary_value(value)
+        if context.get('bin_size'):
+            # client requests only the size of binary fields
+            convert = get_nice_size
+        elif not context.get('bin_raw'):
+            convert = sanitize_binary_value
+        else:
+            return dict(values)
 
-        return new_values
+        return {rid: convert(value) if value else value
+                for rid, value in values.items()}
 
     def get(self, cr, obj, ids, name, uid=False, context=None, values=None):
         multi = self._multi
         # if we already have a value, don't recompute it.
         # This happen if case of stored many2one fields
         if values and not multi and name in values[0]:
-            result = dict((v['id'], v[name]) for v in values)
+            result = {v['id']: v[name] for v in values}
         elif values and multi and all(n in values[0] for n in name):
-            result = dict((v['id'], dict((n, v[n]) for n in name)) for v in values)
+            result = {v['id']: {n: v[n] for n in name} for v in values}
         else:
             result = self._fnct(obj, cr, uid, ids, name, self._arg, context)
         if multi:
@@ -1488,7 +1687,7 @@ class function(_column):
     def _as_display_name(cls, field, cr, uid, obj, value, context=None):
         # Function fields are supposed to emulate a basic field type,
         # so they can delegate to the basic type for record name rendering
-        return globals()[field._type]._as_display_name(field, cr, uid, obj, value, context=context)
+        return _COLUMN_BY_TYPE[field._type]._as_display_name(field, cr, uid, obj, value, context=context)
 
 # ---------------------------------------------------------
 # Related fields
@@ -1504,51 +1703,62 @@ class related(function):
            'bar': fields.related('foo_id', 'frol', type='char', string='Frol of Foo'),
         }
     """
-    __slots__ = ['arg', '_relations']
+    __slots__ = ['arg', '_arg_head', '_arg_tail', '_arg_dotted', '_relations']
 
     def _related_search(self, tobj, cr, uid, obj=None, name=None, domain=None, context=None):
         # assume self._arg = ('foo', 'bar', 'baz')
         # domain = [(name, op, val)]   =>   search [('foo.bar.baz', op, val)]
-        field = '.'.join(self._arg)
-        return [(field, x[1], x[2]) for x in domain]
+        field = self._arg_dotted
+        return [(field, operator, value) for _name, operator, value in domain]
 
     def _related_write(self, obj, cr, uid, ids, field_name, values, args, context=None):
-        if isinstance(ids, int):
-            ids = [ids]
-        for instance in obj.browse(cr, uid, ids, context=context):
-            # traverse all fields except the last one
-            for field in self.arg[:-1]:
-                instance = instance[field][:1]
-            if instance:
-                # write on the last field of the target record
-                instance.write({self.arg[-1]: values})
+        instances = obj.browse(cr, uid, ids, context=context)
+        # traverse all fields except the last one; records sharing the same
+        # parent are traversed only once, as the union removes duplicates
+        for field in self._arg_head:
+            instances = instances.mapped(lambda instance: instance[field][:1])
+        if instances:
+            # write on the last field of the target records
+            instances.write({self._arg_tail: values})
 
     def _related_read(self, obj, cr, uid, ids, field_name, args, context=None):
-        res = {}
-        for record in obj.browse(cr, SUPERUSER_ID, ids, context=context):
-            value = record
-            # traverse all fields except the last one
-            for field in self.arg[:-1]:
-                value = value[field][:1]
-            # read the last field on the target record
-            res[record.id] = value[self.arg[-1]]
+        records = obj.browse(cr, SUPERUSER_ID, ids, context=context)
+        targets = {record.id: record for record in records}
+        # traverse all fields except the last one, one hop at a time for the
+        # whole batch: the records of a hop are all browsed before the next
+        # hop is read, so that each hop is prefetched in a single query
+        current = records
+        for field in self._arg_head:
+            step = {value.id: value[field][:1] for value in current}
+            null = current[:0][field]
+            targets = {rid: step[value.id] if value else null
+                       for rid, value in targets.items()}
+            current = null.browse(list({value.id for value in step.values() if value}))
+        # read the last field on the target records
+        name = self._arg_tail
+        res = {rid: value[name] for rid, value in targets.items()}
 
         if self._type == 'many2one':
             # res[id] is a recordset; convert it to (id, name) or False.
             # Perform name_get as root, as seeing the name of a related object depends on
             # access right of source document, not target, so user may not have access.
-            value_ids = list(set(value.id for value in res.values() if value))
+            value_ids = list({value.id for value in res.values() if value})
             value_name = dict(obj.pool[self._obj].name_get(cr, SUPERUSER_ID, value_ids, context=context))
-            res = dict((id, bool(value) and (value.id, value_name[value.id])) for id, value in res.items())
+            res = {id: (value.id, value_name[value.id]) if value else False
+                   for id, value in res.items()}
 
         elif self._type in ('one2many', 'many2many'):
             # res[id] is a recordset; convert it to a list of ids
-            res = dict((id, value.ids) for id, value in res.items())
+            res = {id: value.ids for id, value in res.items()}
 
         return res
 
     def __init__(self, *arg, **args):
         self.arg = arg
+        # the path split for traversal, and joined for searching
+        self._arg_head = arg[:-1]
+        self._arg_tail = arg[-1] if arg else None
+        self._arg_dotted = '.'.join(arg)
         self._relations = []
         super(related, self).__init__(self._related_read, arg, self._related_write, fnct_inv_arg=arg, fnct_search=self._related_search, **args)
         if self.store is True:
@@ -1609,42 +1819,91 @@ class sparse(function):
         return value
 
     def _sparse_write(self,obj,cr, uid, ids, field_name, value, args, context=None):
-        if not type(ids) == list:
-            ids = [ids]
         records = obj.browse(cr, uid, ids, context=context)
+        # group the records by resulting serialized value, in order to write
+        # each distinct value once on all its records
+        groups = {}
         for record in records:
-            # grab serialized value as object - already deserialized
-            serialized = getattr(record, self.serialization_field)
+            # grab serialized value as object - already deserialized; update
+            # a copy of it, as the original one is shared with the cache
+            serialized = dict(getattr(record, self.serialization_field) or ())
             if value is None:
+                if field_name not in serialized:
+                    # already unset, nothing to write
+                    continue
                 # simply delete the key to unset it.
-                serialized.pop(field_name, None)
+                del serialized[field_name]
             else: 
-                serialized[field_name] = self.convert_value(obj, cr, uid, record, value, serialized.get(field_name), context=context)
-            obj.write(cr, uid, ids, {self.serialization_field: serialized}, context=context)
+                read_value = serialized.get(field_name)
+                if isinstance(read_value, list):
+                    # convert_value() updates one2many lists in place, keep
+                    # the stored list intact to compare with it
+                    read_value = list(read_value)
+                new_value = self.convert_value(obj, cr, uid, record, value, read_value, context=context)
+                if field_name in serialized and serialized[field_name] == new_value:
+                    # unchanged value, nothing to write
+                    continue
+                serialized[field_name] = new_value
+            # the key is only needed to group several records; the value of
+            # a single record is only serialized once, by write()
+            key = _json_dumps(serialized, sort_keys=True) if len(records) > 1 else None
+            groups.setdefault(key, (serialized, []))[1].append(record.id)
+        for serialized, group_ids in groups.values():
+            obj.write(cr, uid, group_ids, {self.serialization_field: serialized}, context=context)
         return True
 
     def _sparse_read(self, obj, cr, uid, ids, field_names, args, context=None):
-        results = {}
         records = obj.browse(cr, uid, ids, context=context)
-        for record in records:
-            # grab serialized value as object - already deserialized
-            serialized = getattr(record, self.serialization_field)
-            results[record.id] = {}
-            for field_name in field_names:
-                field_type = obj._columns[field_name]._type
-                value = serialized.get(field_name, False)
-                if field_type in ('one2many','many2many'):
-                    value = value or []
+        # grab serialized values as objects - already deserialized
+        serialized_values = [(record.id, getattr(record, self.serialization_field))
+                             for record in records]
+        results = {record_id: {} for record_id, serialized in serialized_values}
+        columns = [(field_name, obj._columns[field_name]) for field_name in field_names]
+
+        # read the values field by field, and collect the referenced ids by
+        # relation, in order to check for deleted records with a single query
+        # per relation
+        to_check = defaultdict(set)
+        for field_name, column in columns:
+            field_type = column._type
+            if field_type in ('one2many','many2many'):
+                rel_ids = to_check[column.relation]
+                for record_id, serialized in serialized_values:
+                    value = serialized.get(field_name) or []
+                    rel_ids.update(value)
+                    results[record_id][field_name] = value
+            elif field_type == 'many2one':
+                rel_ids = to_check[column.relation]
+                for record_id, serialized in serialized_values:
+                    value = serialized.get(field_name, False)
+                    if type(value) is int:
+                        rel_ids.add(value)
+                    results[record_id][field_name] = value
+            else:
+                for record_id, serialized in serialized_values:
+                    results[record_id][field_name] = serialized.get(field_name, False)
+
+        # check for deleted records as superuser
+        existing = {
+            relation: set(obj.pool[relation].exists(cr, openerp.SUPERUSER_ID, list(rel_ids)))
+            for relation, rel_ids in to_check.items()
+            if rel_ids
+        }
+
+        # filter out deleted records
+        for field_name, column in columns:
+            field_type = column._type
+            if field_type in ('one2many','many2many'):
+                for result in results.values():
+                    value = result[field_name]
                     if value:
-                        # filter out deleted records as superuser
-                        relation_obj = obj.pool[obj._columns[field_name].relation]
-                        value = relation_obj.exists(cr, openerp.SUPERUSER_ID, value)
-                if type(value) in (int,int) and field_type == 'many2one':
-                    relation_obj = obj.pool[obj._columns[field_name].relation]
-                    # check for deleted record as superuser
-                    if not relation_obj.exists(cr, openerp.SUPERUSER_ID, [value]):
-                        value = False
-                results[record.id][field_name] = value
+                        rel_existing = existing[column.relation]
+                        result[field_name] = [x for x in value if x in rel_existing]
+            elif field_type == 'many2one':
+                for result in results.values():
+                    value = result[field_name]
+                    if type(value) is int and value not in existing[column.relation]:
+                        result[field_name] = False
         return results
 
     def __init__(self, serialization_field, **kwargs):
@@ -1659,13 +1918,19 @@ class sparse(function):
 class dummy(function):
     __slots__ = ['arg', '_relations']
 
-    def _dummy_search(self, tobj, cr, uid, obj=None, name=None, domain=None, context=None):
+    # the methods below do not depend on the field, so they are passed to
+    # function as plain functions instead of bound methods
+
+    @staticmethod
+    def _dummy_search(tobj, cr, uid, obj=None, name=None, domain=None, context=None):
         return []
 
-    def _dummy_write(self, obj, cr, uid, ids, field_name, values, args, context=None):
+    @staticmethod
+    def _dummy_write(obj, cr, uid, ids, field_name, values, args, context=None):
         return False
 
-    def _dummy_read(self, obj, cr, uid, ids, field_name, args, context=None):
+    @staticmethod
+    def _dummy_read(obj, cr, uid, ids, field_name, args, context=None):
         return {}
 
     def __init__(self, *arg, **args):
@@ -1677,6 +1942,22 @@ class dummy(function):
 # Serialized fields
 # ---------------------------------------------------------
 
+# values are encoded with simplejson: orjson would silently store NaN and
+# infinities as null, and accept types that do not read back as themselves
+# (dates, UUIDs) where simplejson rejects them. orjson is only used to decode.
+_json_dumps = simplejson.dumps
+
+if orjson is not None:
+    def _json_loads(val):
+        try:
+            return orjson.loads(val)
+        except ValueError:
+            # non-standard JSON written by simplejson, like NaN
+            return simplejson.loads(val)
+else:
+    _json_loads = simplejson.loads
+
+
 class serialized(_column):
     """ A field able to store an arbitrary python data structure.
     
@@ -1686,10 +1967,10 @@ class serialized(_column):
     __slots__ = []
 
     def _symbol_set_struct(val):
-        return simplejson.dumps(val)
+        return _json_dumps(val)
 
     def _symbol_get_struct(self, val):
-        return simplejson.loads(val or '{}')
+        return _json_loads(val or '{}')
 
     _symbol_c = '%s'
     _symbol_f = _symbol_set_struct
@@ -1702,6 +1983,7 @@ class serialized(_column):
 
 # TODO: review completly this class for speed improvement
 class property(function):
+    _set_multi = True
     __slots__ = []
 
     def to_field_args(self):
@@ -1716,23 +1998,39 @@ class property(function):
             result += ir_property.search_multi(cr, uid, name, tobj._name, operator, value, context=context)
         return result
 
-    def _property_write(self, obj, cr, uid, id, prop_name, value, obj_dest, context=None):
+    def _property_write(self, obj, cr, uid, ids, prop_name, value, obj_dest, context=None):
+        if isinstance(ids, int):
+            ids = [ids]
         ir_property = obj.pool['ir.property']
-        ir_property.set_multi(cr, uid, prop_name, obj._name, {id: value}, context=context)
+        ir_property.set_multi(cr, uid, prop_name, obj._name, dict.fromkeys(ids, value), context=context)
         return True
 
     def _property_read(self, obj, cr, uid, ids, prop_names, obj_dest, context=None):
         ir_property = obj.pool['ir.property']
 
         res = {id: {} for id in ids}
+        values_by_prop = {}
+        # the ids of the many2one values by comodel, to name_get them all at once
+        value_ids_by_comodel = defaultdict(set)
         for prop_name in prop_names:
             field = obj._fields[prop_name]
             values = ir_property.get_multi(cr, uid, prop_name, obj._name, ids, context=context)
+            values_by_prop[prop_name] = values
             if field.type == 'many2one':
-                # name_get the non-null values as SUPERUSER_ID
-                vals = sum(set([_f for _f in iter(values.values()) if _f]),
-                           obj.pool[field.comodel_name].browse(cr, uid, [], context=context))
-                vals_name = dict(vals.sudo().name_get()) if vals else {}
+                value_ids_by_comodel[field.comodel_name].update(
+                    value.id for value in values.values() if value)
+
+        # name_get the non-null values as SUPERUSER_ID
+        names_by_comodel = {}
+        for comodel, value_ids in value_ids_by_comodel.items():
+            vals = obj.pool[comodel].browse(cr, uid, list(value_ids), context=context)
+            names_by_comodel[comodel] = dict(vals.sudo().name_get()) if vals else {}
+
+        for prop_name in prop_names:
+            field = obj._fields[prop_name]
+            values = values_by_prop[prop_name]
+            if field.type == 'many2one':
+                vals_name = names_by_comodel[field.comodel_name]
                 for id, value in values.items():
                     ng = False
                     if value and value.id in vals_name:
@@ -1758,6 +2056,15 @@ class property(function):
         )
 
 
+# column classes by field type, for the columns emulated by function fields
+_COLUMN_BY_TYPE = {
+    cls._type: cls
+    for cls in [boolean, integer, reference, char, text, html, float, date,
+                datetime, binary, selection, many2one, one2many, many2many,
+                serialized]
+}
+
+
 class column_info(object):
     """ Struct containing details about an osv column, either one local to
         its model, or one inherited via _inherits.